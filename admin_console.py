@@ -1,8 +1,17 @@
 import requests
+from requests.adapters import HTTPAdapter
+import atexit
 import time
 import sys
 
-API_URL = "http://localhost:5000/api/trigger_fault"
+BASE_URL = "http://localhost:5000"
+API_URL = f"{BASE_URL}/api/trigger_fault"
+
+# Shared HTTP session: keep-alive reuses the socket across menu commands
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+SESSION.headers.update({"Connection": "keep-alive"})
+atexit.register(SESSION.close)
 
 def clear_screen():
     print("\033c", end="")
@@ -16,6 +25,7 @@ def print_header():
     print("--------------------------------------------------")
 
 def main():
+    pending = [] # Faults queued for a single batch commit
     while True:
         print_header()
         print("\nSELECT TARGET ASSET:")
@@ -23,6 +33,8 @@ def main():
         print("2. Marvel Substation")
         print("3. Bulawayo Industry Feeder")
         print("4. Simulate Smart Home Faults (NEW)")
+        print("5. Queue Fault (Batch Drill)")
+        print(f"6. Commit Batch ({len(pending)} queued)")
         print("q. Quit")
         
         choice = input("\n> ")
@@ -35,6 +47,14 @@ def main():
              handle_smart_home_menu()
              continue
 
+        # Batch drill: queue several faults, then send them in one request
+        if choice == '5':
+             handle_queue_menu(pending)
+             continue
+        if choice == '6':
+             commit_batch(pending)
+             continue
+
         asset_map = {'1': 1, '2': 2, '3': 3}
         if choice not in asset_map:
             print("Invalid selection.")
@@ -44,7 +64,27 @@ def main():
         asset_id = asset_map[choice]
         handle_grid_fault_menu(asset_id)
 
-def handle_grid_fault_menu(asset_id):
+def handle_queue_menu(pending):
+    print("\nSELECT ASSET TO QUEUE:")
+    print("1. Kariba Hydro Gen")
+    print("2. Marvel Substation")
+    print("3. Bulawayo Industry Feeder")
+    print("4. Smart Home (14 Main St)")
+
+    choice = input("\n> ")
+    if choice == '4':
+        handle_smart_home_menu(pending)
+        return
+
+    asset_map = {'1': 1, '2': 2, '3': 3}
+    if choice not in asset_map:
+        print("Invalid selection.")
+        time.sleep(1)
+        return
+
+    handle_grid_fault_menu(asset_map[choice], pending)
+
+def handle_grid_fault_menu(asset_id, pending=None):
     print("\nSELECT FAULT TYPE:")
     print("1. Voltage Dip (Sag)")
     print("2. Voltage Spike (Swell)")
@@ -58,9 +98,9 @@ def handle_grid_fault_menu(asset_id):
             return
             
     fault_type = fault_map[f_choice]
-    send_fault(asset_id, fault_type, is_home=False)
+    send_fault(asset_id, fault_type, is_home=False, pending=pending)
 
-def handle_smart_home_menu():
+def handle_smart_home_menu(pending=None):
     print("\n--- SMART HOME SIMULATION (ID: 14 Main St) ---")
     print("[A] Simulate Grid Surge (265V) -> Trigger Protection")
     print("[B] Simulate Appliance Wear (18A) -> Trigger Warning")
@@ -69,16 +109,16 @@ def handle_smart_home_menu():
     sub_choice = input("\n> ").upper()
     
     if sub_choice == 'A':
-        send_fault(1, "Grid Surge", is_home=True) # Home ID 1
+        send_fault(1, "Grid Surge", is_home=True, pending=pending) # Home ID 1
     elif sub_choice == 'B':
-        send_fault(1, "Home Wear", is_home=True) # Home ID 1
+        send_fault(1, "Home Wear", is_home=True, pending=pending) # Home ID 1
     elif sub_choice == 'C':
         return
     else:
         print("Invalid selection.")
         time.sleep(1)
 
-def send_fault(asset_id, fault_type, is_home=False):
+def send_fault(asset_id, fault_type, is_home=False, pending=None):
     print("\nSELECT DURATION:")
     print("1. 10 Seconds")
     print("2. 30 Seconds")
@@ -95,11 +135,19 @@ def send_fault(asset_id, fault_type, is_home=False):
         "duration": duration,
         "is_home": is_home
     }
+
+    target_str = f"Home {asset_id}" if is_home else f"Grid Asset {asset_id}"
+
+    # Queue mode: hold the command until the batch is committed
+    if pending is not None:
+        pending.append(payload)
+        print(f"\n[QUEUED] {fault_type} -> {target_str} ({duration}s). {len(pending)} in batch.")
+        input("\nPress ENTER to continue...")
+        return
     
     try:
-        target_str = f"Home {asset_id}" if is_home else f"Grid Asset {asset_id}"
         print(f"\nSending command: {fault_type} -> {target_str} ({duration}s)...")
-        res = requests.post(API_URL, json=payload)
+        res = SESSION.post(API_URL, json=payload, timeout=5)
         if res.status_code == 200:
             print("\n[SUCCESS] FAULT INJECTED SUCCESSFULLY.")
             print(f"Server Response: {res.json().get('message', 'OK')}")
@@ -111,6 +159,29 @@ def send_fault(asset_id, fault_type, is_home=False):
         
     input("\nPress ENTER to continue...")
 
+def commit_batch(pending):
+    if not pending:
+        print("\nBatch is empty. Queue faults with Option 5 first.")
+        time.sleep(1)
+        return
+
+    try:
+        print(f"\nSending batch of {len(pending)} faults...")
+        res = SESSION.post(API_URL, json=pending, timeout=5)
+        if res.status_code == 200:
+            results = res.json()
+            print(f"\n[SUCCESS] {len(results)} FAULTS INJECTED SUCCESSFULLY.")
+            for result in results:
+                print(f"  {result.get('target')}: {result.get('message', 'OK')}")
+            pending.clear()
+        else:
+            print(f"\n[ERROR] Server returned {res.status_code}: {res.text}")
+    except Exception as e:
+        print(f"\n[ERROR] Connection failed: {e}")
+        print("Ensure app.py is running.")
+
+    input("\nPress ENTER to continue...")
+
 if __name__ == "__main__":
     try:
         main()
@@ -1,21 +1,66 @@
+import atexit
 import sqlite3
+import gzip
+import logging
+import logging.handlers
+import queue
 import threading
 import time
 import random
 import math
-from typing import List, Dict, Any, Optional, Tuple
-from flask import Flask, jsonify, render_template, request
+from dataclasses import dataclass
+from functools import partial
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from flask import Flask, render_template, request
+import orjson
 
 # ==========================================
 # CONFIGURATION & SETUP
 # ==========================================
 app = Flask(__name__)
+app.debug = False # Never run the Werkzeug debugger in the served app
+app.config['PROPAGATE_EXCEPTIONS'] = True # Let waitress log request errors
+app.config['TEMPLATES_AUTO_RELOAD'] = False
 DB_NAME = "infrastructure.db"
+IDLE_AFTER = 30.0 # Seconds without a dashboard poll before the sim slows down
+IDLE_TICK = 10.0  # Sim tick interval while idle (normal rate is 1 Hz)
+STATUS_GZIP_MIN_SIZE = 500 # Bytes; smaller /api/status bodies are sent uncompressed
+MAX_FAULT_DURATION = 3600 # Seconds; longest fault an admin can inject
+
+# Fault events are logged through a queue: request threads only enqueue,
+# and _LOG_LISTENER writes them to stderr, flushing the queue at exit.
+logger = logging.getLogger("digital_twin")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+_LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, _log_handler)
+_LOG_LISTENER.start()
+atexit.register(_LOG_LISTENER.stop)
 
 # ==========================================
 # 1. CORE INNOVATION: DIGITAL TWIN LOGIC
 # ==========================================
 
+# Health labels indexed by severity code (0 = NORMAL, 1 = WARNING, 2 = CRITICAL)
+HEALTH_LEVELS = ("NORMAL", "WARNING", "CRITICAL")
+
+# Engineering advisories (grid assets)
+REC_NORMAL = "System Optimal. No Action Required."
+REC_UNDERVOLT = "Possible Overload. Inspect Transformer Tap Changer."
+REC_OVERVOLT = "Load Rejection. Check for Capacitor Bank malfunction."
+REC_ANOMALY = "Anomaly Detected. Manual Inspection Required."
+
+# IoT (status, advisory) results (smart homes)
+HOME_RESULT_SURGE = ("PROTECTION ACTIVE", "Surge Detected. Power Cut to Save Appliances.")
+HOME_RESULT_WEAR = ("WARNING", "High Current. Check AC Compressor Health.")
+HOME_RESULT_NORMAL = ("NORMAL", "Home System Nominal.")
+
+# IoT status -> dashboard health color
+HOME_HEALTH_UI = {"PROTECTION ACTIVE": "CRITICAL", "WARNING": "WARNING"}
+
 class DigitalTwinModel:
     """
     The core logic engine. Calculates Expected Behavior based on physics
@@ -60,16 +105,46 @@ class DigitalTwinModel:
         Generates actionable engineering advice based on the fault signature.
         """
         if health_status == "NORMAL":
-            return "System Optimal. No Action Required."
+            return REC_NORMAL
         
         if real_value < expected_value:
              # Voltage Sag / Undervoltage
-            return "Possible Overload. Inspect Transformer Tap Changer."
+            return REC_UNDERVOLT
         elif real_value > expected_value:
              # Voltage Swell / Overvoltage
-             return "Load Rejection. Check for Capacitor Bank malfunction."
+             return REC_OVERVOLT
         
-        return "Anomaly Detected. Manual Inspection Required."
+        return REC_ANOMALY
+
+    @staticmethod
+    def analyze_batch(rated_voltages: List[float], current_loads: List[float], impedance_factors: List[float],
+                      real_values: List[float]) -> Tuple[List[float], List[str], List[str]]:
+        """
+        Full twin analysis for a batch of grid assets in one call.
+        Returns (expected voltages, health statuses, recommendations).
+        """
+        expected: List[float] = []
+        health: List[str] = []
+        recs: List[str] = []
+
+        # One fused pass per asset: expected voltage -> deviation -> severity -> advice
+        for v_rated, i_load, z, real in zip(rated_voltages, current_loads, impedance_factors, real_values):
+            e = v_rated - i_load * z
+            d = abs((real - e) / e) * 100.0 if e != 0 else math.inf
+            level = (d > 5.0) + (d > 10.0)
+
+            expected.append(e)
+            health.append(HEALTH_LEVELS[level])
+            if level == 0:
+                recs.append(REC_NORMAL)
+            elif real < e:
+                recs.append(REC_UNDERVOLT)
+            elif real > e:
+                recs.append(REC_OVERVOLT)
+            else:
+                recs.append(REC_ANOMALY)
+
+        return expected, health, recs
 
     @staticmethod
     def analyze_home_iot(voltage: float, current: float) -> Tuple[str, str]:
@@ -78,14 +153,22 @@ class DigitalTwinModel:
         """
         # Preventive Logic: Surge Protection
         if voltage > 255.0:
-            return "PROTECTION ACTIVE", "Surge Detected. Power Cut to Save Appliances."
+            return HOME_RESULT_SURGE
         
         # Predictive Logic: Appliance Health
         # Normal voltage but high current indicates motor strain (e.g., AC compressor)
         if current > 15.0:
-            return "WARNING", "High Current. Check AC Compressor Health."
+            return HOME_RESULT_WEAR
 
-        return "NORMAL", "Home System Nominal."
+        return HOME_RESULT_NORMAL
+
+    @staticmethod
+    def analyze_home_iot_batch(voltages: List[float], currents: List[float]) -> List[Tuple[str, str]]:
+        """
+        Batch form of analyze_home_iot. Same thresholds, one pass over all homes.
+        """
+        return [HOME_RESULT_SURGE if v > 255.0 else HOME_RESULT_WEAR if i > 15.0 else HOME_RESULT_NORMAL
+                for v, i in zip(voltages, currents)]
 
 # ==========================================
 # MODULES (Generation, Transmission, Distribution)
@@ -121,174 +204,271 @@ class SmartHomeModule:
         # Base: 5A (Lights, TV), Peak: 20A (AC, Kettle)
         return 8.0 + random.uniform(-1.0, 3.0)
 
+# Asset type -> load profile function (one hash lookup instead of an if-chain)
+LOAD_FNS: Dict[str, Callable[[], float]] = {
+    "Generation": GenerationModule.get_load_profile,
+    "Transmission": TransmissionModule.get_load_profile,
+    "Distribution": DistributionModule.get_load_profile,
+    "Smart Home": SmartHomeModule.get_load_profile,
+}
+
 def get_module_load(asset_type: str) -> float:
     """Factory function to get load based on asset type."""
-    if asset_type == "Generation":
-        return GenerationModule.get_load_profile()
-    elif asset_type == "Transmission":
-        return TransmissionModule.get_load_profile()
-    elif asset_type == "Distribution":
-        return DistributionModule.get_load_profile()
-    elif asset_type == "Smart Home":
-        return SmartHomeModule.get_load_profile()
-    return 10.0 # Default
+    fn = LOAD_FNS.get(asset_type)
+    return fn() if fn else 10.0 # Default
 
 # ==========================================
 # 2. BACKEND: DATABASE & SIMULATION
 # ==========================================
 
 # Global dictionary to hold current real-time sensor state in memory
-# Key: asset_id (negative for homes to avoid collision or separate dict), Value: current_real_voltage
-# Simplified: We'll use positive IDs for everything, assuming they don't overlap in DB seeding.
+# Key: integer state key, Value: current_real_voltage
+# Grid assets use their DB id; homes are shifted by HOME_OFFSET so the two
+# tables' AUTOINCREMENT ids never collide; parse_fault_command() only accepts
+# ids present in the loaded catalog. The "grid_1"/"home_1" strings are only
+# formatted for the UI.
+HOME_OFFSET = 100000
 SENSOR_STATE: Dict[int, float] = {}
 
+# Load (Amps) drawn by each asset on the latest sim tick, same keys as SENSOR_STATE.
+# build_status reuses it instead of sampling the load profile a second time.
+LOAD_STATE: Dict[int, float] = {}
+
 # Fault Injection State
-# Key: asset_id, Value: dict { 'type': str, 'end_time': float }
+# Key: integer state key (see SENSOR_STATE),
+# Value: dict { 'type': str, 'effect': FAULT_OPS entry, 'end_time': float (time.monotonic() deadline) }
 FAULT_STATE: Dict[int, Dict[str, Any]] = {}
+# Held for FAULT_STATE writes (HTTP threads) and expiry (sim thread); reads are lock-free
+_FAULT_LOCK = threading.Lock()
+
+# In-memory copy of the seeded tables. Rows never change after init_db(),
+# so the sim loop and API read these instead of querying SQLite each time.
+# POST /api/reload_assets refreshes them if the database is edited.
+# ASSET_CACHE rows: (id, name, type, rated_voltage, impedance)
+# HOME_CACHE rows: (id, address, owner)
+ASSET_CACHE: List[Tuple[int, str, str, float, float]] = []
+HOME_CACHE: List[Tuple[int, str, str]] = []
+
+# Column views of ASSET_CACHE for batch analysis in build_status
+GRID_IDS: List[int] = []
+GRID_UI_IDS: List[str] = []
+GRID_TYPES: List[str] = []
+GRID_RATED: List[float] = []
+GRID_IMPEDANCE: List[float] = []
+
+# Column views of HOME_CACHE
+HOME_KEYS: List[int] = []
+HOME_UI_IDS: List[str] = []
+
+# Per-asset simulation steps specialized by make_sim_step(), one call per tick
+SIM_STEPS: List[Callable[[float], None]] = []
+
+# Held while the catalog-derived state above (caches, columns, STATUS_PREFIX,
+# SIM_STEPS) is swapped by load_asset_cache() and while a sim tick or
+# publish_status() reads it, so a reload is never seen half-applied.
+_CATALOG_LOCK = threading.RLock()
+
+# Pre-encoded static part of each asset's status object: b'{"id":..,"name":..,...,'
+# Built by load_asset_cache(); publish_status() appends the per-tick fields.
+STATUS_PREFIX: Dict[str, bytes] = {}
+
+@dataclass
+class StatusReading:
+    """Per-tick fields of an asset's /api/status entry (serialized natively by orjson)."""
+    __slots__ = ("real_value", "expected_value", "health_status", "load_amps", "recommendation")
+    real_value: float
+    expected_value: float
+    health_status: str
+    load_amps: float
+    recommendation: str
+
+# Pre-encoded /api/status JSON, refreshed once per sim tick by publish_status()
+# Key: UI id ("grid_1", "home_1"), Value: orjson bytes of that asset's status
+ASSET_JSON: Dict[str, bytes] = {}
+_STATUS_LOCK = threading.Lock()
+
+# Full /api/status body joined from ASSET_JSON, and a counter bumped on every
+# publish. The version doubles as the ETag so unchanged polls get a 304;
+# the process start time is prefixed so ETags never repeat across restarts.
+STATUS_VERSION = 0
+_STATUS_BODY = b""
+_STATUS_GZIP: Optional[bytes] = None # gzip of _STATUS_BODY, compressed once per publish
+_STATUS_EPOCH = int(time.time())
+
+# Last /api/status poll (time.monotonic()); the sim loop idles when it goes stale
+LAST_POLL = time.monotonic()
+_WAKE_SIM = threading.Event()
+
+# Single SQLite connection shared by all threads (see get_db_connection)
+_DB: Optional[sqlite3.Connection] = None
+_DB_LOCK = threading.Lock()
+
+# Voltage effect of each injectable fault: ("mul", factor) or ("set", volts).
+# "Home Wear" leaves voltage normal; its current spike is applied in build_status.
+FAULT_OPS: Dict[str, Tuple[Optional[str], float]] = {
+    "Voltage Dip": ("mul", 0.65),
+    "Voltage Spike": ("mul", 1.40),
+    "Zero Voltage": ("set", 0.0),
+    # Specific Smart Home Faults
+    "Grid Surge": ("set", 265.0), # Trigger Protection
+}
+NO_FAULT_EFFECT: Tuple[Optional[str], float] = (None, 0.0)
+
+# Fault types accepted by /api/trigger_fault (grid faults + Smart Home faults)
+VALID_FAULTS = frozenset(("Voltage Dip", "Voltage Spike", "Zero Voltage", "Grid Surge", "Home Wear"))
 
 def init_db() -> None:
     """Initialize SQLite database with the schema and seed data."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    with _DB_LOCK:
+        conn = get_db_connection()
+        cursor = conn.cursor()
     
-    # 1. Grid Assets Table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS assets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            type TEXT NOT NULL,
-            rated_voltage REAL NOT NULL,
-            impedance REAL NOT NULL
-        )
-    ''')
+        # 1. Grid Assets Table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS assets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                rated_voltage REAL NOT NULL,
+                impedance REAL NOT NULL
+            )
+        ''')
     
-    # 2. Smart Homes Table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS smart_homes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            address TEXT NOT NULL,
-            owner TEXT NOT NULL
-        )
-    ''')
+        # 2. Smart Homes Table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS smart_homes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                address TEXT NOT NULL,
+                owner TEXT NOT NULL
+            )
+        ''')
     
-    # Seed Grid Assets
-    cursor.execute('SELECT count(*) FROM assets')
-    if cursor.fetchone()[0] == 0:
-        print("Seeding Grid Assets...")
-        seed_data = [
-            ("Kariba Hydro Gen", "Generation", 11000.0, 5.2),      # 11kV Generator
-            ("Marvel Substation", "Transmission", 33000.0, 12.5),  # 33kV Substation
-            ("Bulawayo Industry Feeder", "Distribution", 400.0, 1.1) # 400V Feeder
-        ]
-        cursor.executemany('INSERT INTO assets (name, type, rated_voltage, impedance) VALUES (?, ?, ?, ?)', seed_data)
-
-
-    # Seed Smart Homes
-    cursor.execute('SELECT count(*) FROM smart_homes')
-    if cursor.fetchone()[0] == 0:
-        print("Seeding Smart Homes...")
-        # Start ID at 99 to distinct visually in logs, though AUTOINCREMENT handles it.
-        # SQLite autoincrement is separate per table.
-        # We'll just insert and let it be 1.
-        cursor.execute('INSERT INTO smart_homes (address, owner) VALUES (?, ?)', 
-                       ("14 Main St, Bulawayo", "Mr. Dube"))
+        # Seed Grid Assets
+        cursor.execute('SELECT count(*) FROM assets')
+        if cursor.fetchone()[0] == 0:
+            print("Seeding Grid Assets...")
+            seed_data = [
+                ("Kariba Hydro Gen", "Generation", 11000.0, 5.2),      # 11kV Generator
+                ("Marvel Substation", "Transmission", 33000.0, 12.5),  # 33kV Substation
+                ("Bulawayo Industry Feeder", "Distribution", 400.0, 1.1) # 400V Feeder
+            ]
+            cursor.executemany('INSERT INTO assets (name, type, rated_voltage, impedance) VALUES (?, ?, ?, ?)', seed_data)
+
+
+        # Seed Smart Homes
+        cursor.execute('SELECT count(*) FROM smart_homes')
+        if cursor.fetchone()[0] == 0:
+            print("Seeding Smart Homes...")
+            # Start ID at 99 to distinct visually in logs, though AUTOINCREMENT handles it.
+            # SQLite autoincrement is separate per table.
+            # We'll just insert and let it be 1.
+            cursor.execute('INSERT INTO smart_homes (address, owner) VALUES (?, ?)', 
+                           ("14 Main St, Bulawayo", "Mr. Dube"))
         
-    conn.commit()
-    conn.close()
-
-def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def simulation_worker() -> None:
+        conn.commit()
+
+    load_asset_cache()
+
+def load_asset_cache() -> None:
+    """(Re)loads ASSET_CACHE and HOME_CACHE from the database."""
+    with _DB_LOCK:
+        conn = get_db_connection()
+        assets = conn.execute('SELECT id, name, type, rated_voltage, impedance FROM assets').fetchall()
+        homes = conn.execute('SELECT id, address, owner FROM smart_homes').fetchall()
+
+    # Plain tuple rows (no row_factory), columns in the SELECT order above.
+    # Everything is built locally first, then swapped in under _CATALOG_LOCK.
+    grid_ui_ids = [f"grid_{a[0]}" for a in assets]
+    home_ui_ids = [f"home_{h[0]}" for h in homes]
+
+    prefixes = {}
+    for ui_id, (_, name, a_type, _, _) in zip(grid_ui_ids, assets):
+        prefixes[ui_id] = orjson.dumps({"id": ui_id, "name": name, "type": a_type})[:-1] + b","
+    for ui_id, (_, address, owner) in zip(home_ui_ids, homes):
+        # Homes display their address as the name
+        prefixes[ui_id] = orjson.dumps({"id": ui_id, "name": address, "owner": owner, "type": "Smart Home"})[:-1] + b","
+
+    # Homes are 230V residential standard
+    steps = ([make_sim_step(a_id, rated_v, a_type) for a_id, _, a_type, rated_v, _ in assets]
+             + [make_sim_step(h_id, 230.0, "Smart Home", is_home=True) for h_id, _, _ in homes])
+
+    with _CATALOG_LOCK:
+        ASSET_CACHE[:] = assets
+        HOME_CACHE[:] = homes
+
+        GRID_IDS[:] = [a[0] for a in assets]
+        GRID_UI_IDS[:] = grid_ui_ids
+        GRID_TYPES[:] = [a[2] for a in assets]
+        GRID_RATED[:] = [a[3] for a in assets]
+        GRID_IMPEDANCE[:] = [a[4] for a in assets]
+
+        HOME_KEYS[:] = [h[0] + HOME_OFFSET for h in homes]
+        HOME_UI_IDS[:] = home_ui_ids
+
+        STATUS_PREFIX.clear()
+        STATUS_PREFIX.update(prefixes)
+        SIM_STEPS[:] = steps
+
+def get_db_connection() -> sqlite3.Connection:
     """
-    Background thread to simulate sensor data.
-    Updates SENSOR_STATE with realistic noise or injected faults.
+    Returns the shared, long-lived SQLite connection (opened on first use).
+    Callers must hold _DB_LOCK while using it.
     """
-    print("Starting simulation worker...")
-    while True:
-        try:
-            conn = get_db_connection()
-            grid_assets = conn.execute('SELECT * FROM assets').fetchall()
-            homes = conn.execute('SELECT * FROM smart_homes').fetchall()
-            conn.close()
-
-            current_time = time.time()
-
-            # --- PROCESS GRID ASSETS ---
-            for asset in grid_assets:
-                sim_step(asset['id'], asset['rated_voltage'], asset['type'], current_time)
-
-            # --- PROCESS SMART HOMES ---
-            # Homes are 230V residential standard
-            for home in homes:
-                # We map home IDs to a safe range if needed, but here we'll use a string key prefix or just negative IDs? 
-                # Let's use a composite key approach in memory or just assume IDs don't collide? 
-                # Tables have separate IDs (1, 2, 3...). 
-                # To avoid collision in SENSOR_STATE, we'll prefix keys: "grid_1", "home_1".
-                # Refactor SENSOR_STATE to use string keys.
-                pass 
-            
-            # REFACTOR: SENSOR_STATE keys will be strings: "grid_{id}" and "home_{id}"
-            # This requires updating the sim_step function.
+    global _DB
+    if _DB is None:
+        _DB = sqlite3.connect(DB_NAME, check_same_thread=False)
+        _DB.execute("PRAGMA journal_mode=WAL")
+        _DB.execute("PRAGMA synchronous=NORMAL")
+    return _DB
+
+def apply_fault(key: int, simulated_value: float, current_time: float, label: str) -> float:
+    """Applies the active injected fault (if any) to a simulated voltage."""
+    fault = FAULT_STATE.get(key)
+    if fault is None:
+        return simulated_value
+
+    if current_time > fault['end_time']:
+        with _FAULT_LOCK:
+            # Only expire the entry we read; a new fault may have replaced it meanwhile
+            if FAULT_STATE.get(key) is fault:
+                del FAULT_STATE[key]
+                logger.info("Fault expired for %s", label)
+        return simulated_value
+
+    op, val = fault['effect']
+    if op == "mul":
+        return simulated_value * val
+    elif op == "set":
+        return val
+    return simulated_value
+
+def make_sim_step(db_id: int, rated_v: float, asset_type: str, is_home: bool = False) -> Callable[[float], None]:
+    """
+    Builds the simulation step for one asset. Its state key, rated voltage and
+    load function are bound once here, so the per-tick call does no type
+    dispatch or key arithmetic.
+    """
+    key = db_id + HOME_OFFSET if is_home else db_id
+    label = f"home_{db_id}" if is_home else f"grid_{db_id}"
+    load_fn = LOAD_FNS.get(asset_type) or partial(get_module_load, asset_type)
+    rand = random.random
 
-        except Exception as e:
-            print(f"Simulation Error: {e}")
-        
-        time.sleep(1) # Update every second
+    def step(current_time: float) -> None:
+        # 1. Normal Noise (+/-1%); random() is a single C call, uniform() adds a Python frame
+        # 2. Voltage drop from the module's load profile
+        load = load_fn()
+        simulated_value = rated_v + (rand() * 0.02 - 0.01) * rated_v - load * 0.05
 
-def sim_step(db_id: int, rated_v: float, asset_type: str, current_time: float, is_home: bool = False):
-    """Refactored simulation step for any asset."""
-    global SENSOR_STATE, FAULT_STATE
-    
-    key = f"home_{db_id}" if is_home else f"grid_{db_id}"
-    
-    # 1. Normal Noise
-    noise = random.uniform(-0.01, 0.01) * rated_v
-    simulated_value = rated_v + noise
+        # 3. FAULT INJECTION
+        simulated_value = apply_fault(key, simulated_value, current_time, label)
 
-    # 2. Physics / Simulation Logic
-    # Homes have different behavior? For now, similar voltage drop logic
-    load = get_module_load(asset_type)
-    
-    # Voltage drop simulation
-    simulated_value -= (load * 0.05) 
-
-    # 3. FAULT INJECTION
-    if key in FAULT_STATE:
-        fault = FAULT_STATE[key]
-        if current_time > fault['end_time']:
-            del FAULT_STATE[key]
-            print(f"Fault expired for {key}")
-        else:
-            f_type = fault['type']
-            if f_type == "Voltage Dip":
-                 simulated_value = simulated_value * 0.65
-            elif f_type == "Voltage Spike":
-                 simulated_value = simulated_value * 1.40
-            elif f_type == "Zero Voltage":
-                 simulated_value = 0.0
-            
-            # Specific Smart Home Faults
-            elif f_type == "Grid Surge":
-                simulated_value = 265.0 # Trigger Protection
-            elif f_type == "Home Wear":
-                # Voltage normal, but we need to trick the current.
-                # Since this function only returns VOLTAGE, 
-                # we need to store the Fake Load somewhere or calculate it.
-                # Hack: We'll store a "Force Current" flag in SENSOR_STATE?
-                # Better: SENSOR_STATE values become objects: { 'v': float, 'i': float }
-                # For simplicity, we'll just handle voltage here since Current is derived in get_status 
-                # UNLESS we override it.
-                pass # Handled in get_status by checking FAULT_STATE directly
-
-    # Store state
-    # We now store just voltage in simple SENSOR_STATE for backward compat, 
-    # but for homes we might need more. 
-    # Let's stick to Voltage in SENSOR_STATE. 
-    # We will handle "Current Injection" primarily in the read logic (get_status).
-    SENSOR_STATE[key] = round(simulated_value, 2)
+        # Store state
+        # SENSOR_STATE holds voltage only; "Home Wear" current injection is
+        # handled in the read logic (build_status).
+        SENSOR_STATE[key] = round(simulated_value, 2)
+        LOAD_STATE[key] = load
+
+    return step
 
 def simulation_worker_refactored() -> None:
     """
@@ -297,138 +477,227 @@ def simulation_worker_refactored() -> None:
     print("Starting Main Simulation Loop...")
     while True:
         try:
-            conn = get_db_connection()
-            grid_assets = conn.execute('SELECT * FROM assets').fetchall()
-            homes = conn.execute('SELECT * FROM smart_homes').fetchall()
-            conn.close()
-
-            t = time.time()
-
-            # Grid
-            for a in grid_assets:
-                sim_step(a['id'], a['rated_voltage'], a['type'], t, is_home=False)
-            
-            # Homes (Standard 230V)
-            for h in homes:
-                sim_step(h['id'], 230.0, "Smart Home", t, is_home=True)
+            t = time.monotonic()
+
+            with _CATALOG_LOCK:
+                # Grid assets, then homes (see load_asset_cache)
+                for step in SIM_STEPS:
+                    step(t)
+
+                # Encode the dashboard payload once per tick, not once per poll
+                publish_status()
                 
         except Exception as e:
             print(f"Sim Loop Error: {e}")
-        time.sleep(1)
+
+        # Tick at 1 Hz while a dashboard is polling; back off when nobody is
+        idle = time.monotonic() - LAST_POLL > IDLE_AFTER
+        _WAKE_SIM.wait(IDLE_TICK if idle else 1)
+        _WAKE_SIM.clear()
 
 # ==========================================
 # FLASK API ENDPOINTS
 # ==========================================
 
+def _json_response(obj: Any, status: int = 200) -> Any:
+    """Builds a JSON response with orjson; pre-encoded bytes are sent as-is."""
+    body = obj if isinstance(obj, bytes) else orjson.dumps(obj)
+    return app.response_class(body, status=status, mimetype="application/json")
+
+# index.html has no per-request context, so it is rendered once and reused
+_INDEX_HTML: Optional[bytes] = None
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    global _INDEX_HTML
+    if _INDEX_HTML is None:
+        _INDEX_HTML = render_template('index.html').encode()
+    return app.response_class(_INDEX_HTML, mimetype="text/html")
 
 @app.route('/api/status', methods=['GET'])
 def get_status() -> Any:
-    conn = get_db_connection()
-    grid = conn.execute('SELECT * FROM assets').fetchall()
-    homes = conn.execute('SELECT * FROM smart_homes').fetchall()
-    conn.close()
-
-    response_data: List[Dict[str, Any]] = []
-
-    # 1. Process Grid Assets
-    for asset in grid:
-        key = f"grid_{asset['id']}"
-        rated_v = asset['rated_voltage']
-        
-        # Get Sensor Data
-        real_v = SENSOR_STATE.get(key, rated_v)
-        current_load = get_module_load(asset['type'])
-
-        # Analysis
-        expected_v = DigitalTwinModel.calculate_expected_voltage(rated_v, current_load, asset['impedance'])
-        health = DigitalTwinModel.analyze_health(real_v, expected_v)
-        rec = DigitalTwinModel.get_recommendation(real_v, expected_v, health)
-
-        response_data.append({
-            "id": key, # Unique UI ID
-            "name": asset['name'],
-            "type": asset['type'],
-            "real_value": real_v,
-            "expected_value": round(expected_v, 2),
-            "health_status": health,
-            "load_amps": round(current_load, 2),
-            "recommendation": rec
-        })
-
-    # 2. Process Smart Homes
-    for home in homes:
-        key = f"home_{home['id']}"
-        rated_v = 230.0
-        
-        # Sensor Data
-        real_v = SENSOR_STATE.get(key, rated_v)
-        
-        # Check for Current Injection (Fault Simulation)
-        # If "Home Wear" fault is active, force Current to 18A
-        # Otherwise normal 8A range
+    """
+    Dashboard feed. Served entirely from memory (_STATUS_BODY); the request
+    path never opens or queries SQLite.
+    """
+    global LAST_POLL
+    now = time.monotonic()
+    if now - LAST_POLL > IDLE_AFTER:
+        _WAKE_SIM.set() # Dashboard is back; resume 1 Hz without waiting out the idle tick
+    LAST_POLL = now
+
+    if not ASSET_JSON:
+        publish_status() # First poll before the sim loop has ticked
+
+    with _STATUS_LOCK:
+        body, gz_body, version = _STATUS_BODY, _STATUS_GZIP, STATUS_VERSION
+
+    etag = f"{_STATUS_EPOCH}-{version}"
+    if gz_body is not None and request.accept_encodings["gzip"] > 0:
+        resp = _json_response(gz_body)
+        resp.headers['Content-Encoding'] = 'gzip'
+        etag += "-gz" # Distinct representation, distinct validator
+    else:
+        resp = _json_response(body)
+
+    resp.vary.add('Accept-Encoding')
+    resp.headers['Cache-Control'] = 'public, max-age=1' # Lets proxies coalesce polls within a tick
+    resp.set_etag(etag)
+    return resp.make_conditional(request) # 304, empty body, if If-None-Match matches
+
+def publish_status() -> None:
+    """Serializes the status payload once per tick so every poll reuses the bytes."""
+    global STATUS_VERSION, _STATUS_BODY, _STATUS_GZIP
+    # Catalog then status lock, so concurrent publishes land in catalog order
+    with _CATALOG_LOCK:
+        # Static prefix + dynamic fields: orjson's leading "{" is replaced by the prefix
+        fragments = {ui_id: STATUS_PREFIX[ui_id] + orjson.dumps(reading)[1:]
+                     for ui_id, reading in build_status()}
+
+        with _STATUS_LOCK:
+            # Replace, not merge: assets dropped by a reload must disappear
+            ASSET_JSON.clear()
+            ASSET_JSON.update(fragments)
+            _STATUS_BODY = b"[%b]" % b",".join(ASSET_JSON.values()) # One copy, no intermediate concat
+            _STATUS_GZIP = gzip.compress(_STATUS_BODY) if len(_STATUS_BODY) >= STATUS_GZIP_MIN_SIZE else None
+            STATUS_VERSION += 1
+
+def build_status() -> List[Tuple[str, StatusReading]]:
+    """
+    Runs the Digital Twin analysis for every asset and home.
+    Returns (UI id, reading); static fields live in STATUS_PREFIX.
+    """
+    response_data: List[Tuple[str, StatusReading]] = []
+
+    # 1. Process Grid Assets (column-wise over the cached asset table)
+    loads = [LOAD_STATE[k] if k in LOAD_STATE else get_module_load(t) for k, t in zip(GRID_IDS, GRID_TYPES)]
+    reals = [SENSOR_STATE.get(k, r) for k, r in zip(GRID_IDS, GRID_RATED)]
+    expected, healths, recs = DigitalTwinModel.analyze_batch(GRID_RATED, loads, GRID_IMPEDANCE, reals)
+
+    for ui_id, real_v, expected_v, health, current_load, rec in zip(
+            GRID_UI_IDS, reals, expected, healths, loads, recs):
+        response_data.append((ui_id, StatusReading(
+            real_v, round(expected_v, 2), health, round(current_load, 2), rec)))
+
+    # 2. Process Smart Homes (column-wise, 230V nominal)
+    home_volts = [SENSOR_STATE.get(k, 230.0) for k in HOME_KEYS]
+
+    # Check for Current Injection (Fault Simulation)
+    # If "Home Wear" fault is active, force Current to 18A
+    # Otherwise normal 8A range
+    home_loads = []
+    for key in HOME_KEYS:
         fault_entry = FAULT_STATE.get(key)
         if fault_entry and fault_entry['type'] == 'Home Wear':
-             current_load = 18.5 # High current
+            home_loads.append(18.5) # High current
+        elif key in LOAD_STATE:
+            home_loads.append(LOAD_STATE[key])
         else:
-             current_load = SmartHomeModule.get_load_profile()
-
-        # IoT Logic
-        status, advisory = DigitalTwinModel.analyze_home_iot(real_v, current_load)
-        
-        # Determine Color/Health for UI based on status
-        health_ui = "NORMAL"
-        if status == "PROTECTION ACTIVE": health_ui = "CRITICAL"
-        if status == "WARNING": health_ui = "WARNING"
-
-        response_data.append({
-            "id": key,
-            "name": home['address'], # Display Address
-            "owner": home['owner'],
-            "type": "Smart Home",
-            "real_value": real_v,
-            "expected_value": 230.0, # Nominal
-            "health_status": health_ui,
-            "load_amps": round(current_load, 2),
-            "recommendation": advisory # The IoT Message
-        })
-
-    return jsonify(response_data)
+            home_loads.append(SmartHomeModule.get_load_profile())
+
+    # IoT Logic
+    home_results = DigitalTwinModel.analyze_home_iot_batch(home_volts, home_loads)
+
+    for ui_id, real_v, current_load, (status, advisory) in zip(
+            HOME_UI_IDS, home_volts, home_loads, home_results):
+        response_data.append((ui_id, StatusReading(
+            real_v,
+            230.0, # Nominal
+            HOME_HEALTH_UI.get(status, "NORMAL"), # Color/Health for UI
+            round(current_load, 2),
+            advisory))) # The IoT Message
+
+    return response_data
+
+@app.route('/api/reload_assets', methods=['POST'])
+def reload_assets() -> Any:
+    """Re-reads the asset catalog after the database is edited out of band."""
+    load_asset_cache()
+    publish_status()
+    return _json_response({"status": "Reloaded", "assets": len(ASSET_CACHE), "homes": len(HOME_CACHE)})
+
+def parse_fault_command(data: Dict[str, Any]) -> Tuple[int, str, int, bool]:
+    """
+    Converts one fault command to typed fields: (asset_id, fault_type, duration, is_home).
+    Raises KeyError, TypeError or ValueError if the command is malformed.
+    """
+    # Contract: integer "asset_id" (DB id); boolean "is_home" picks smart home vs grid asset.
+    raw_id = data['asset_id']
+    fault_type = data['fault_type']
+    duration = data.get('duration', 10)
+    is_home = data.get('is_home', False)
+    # bool is an int subclass, so exclude it explicitly
+    if not isinstance(raw_id, int) or isinstance(raw_id, bool):
+        raise TypeError(f"asset_id must be an integer: {raw_id!r}")
+    if not isinstance(duration, int) or isinstance(duration, bool):
+        raise TypeError(f"duration must be an integer: {duration!r}")
+    if not isinstance(is_home, bool):
+        raise TypeError(f"is_home must be a boolean: {is_home!r}")
+    # Unknown ids would alias the other table's keys or leave a fault no sim step expires
+    with _CATALOG_LOCK:
+        known = raw_id + HOME_OFFSET in HOME_KEYS if is_home else raw_id in GRID_IDS
+    if not known:
+        raise ValueError(f"Unknown {'home' if is_home else 'grid asset'} id: {raw_id}")
+    if fault_type not in VALID_FAULTS:
+        raise ValueError(f"Unknown fault type: {fault_type}")
+    if not 0 < duration <= MAX_FAULT_DURATION:
+        raise ValueError(f"Duration must be 1-{MAX_FAULT_DURATION} seconds: {duration}")
+    return raw_id, fault_type, duration, is_home
+
+def inject_fault(raw_id: int, fault_type: str, duration: int, is_home: bool) -> Dict[str, Any]:
+    """Applies a single parsed fault command to FAULT_STATE and returns its result."""
+    key = raw_id + HOME_OFFSET if is_home else raw_id
+    target = f"home_{raw_id}" if is_home else f"grid_{raw_id}"
+
+    # Set fault state. The voltage effect is resolved here, once, so the
+    # sim tick never looks the fault type up again.
+    with _FAULT_LOCK:
+        FAULT_STATE[key] = {
+            "type": fault_type,
+            "effect": FAULT_OPS.get(fault_type, NO_FAULT_EFFECT),
+            "end_time": time.monotonic() + duration
+        }
+
+    logger.info("FAULT INJECTED: %s, Type %s, Duration %ds", target, fault_type, duration)
+    return {"status": "Fault Injected", "target": target, "message": "Command Sent."}
 
 @app.route('/api/trigger_fault', methods=['POST'])
 def trigger_fault() -> Any:
-    data = request.json
+    raw = request.get_data(cache=False)
+    try:
+        data = orjson.loads(raw) if raw else None
+    except orjson.JSONDecodeError:
+        return _json_response({"error": "Invalid JSON"}, 400)
     if not data:
-        return jsonify({"error": "No data provided"}), 400
-
-    # ID now comes in as integer from new admin console, 
-    # BUT we need to know if it's grid or home.
-    # New Admin Console will send target_type? Or we infer?
-    # Let's update Admin Console to send "grid_1" or "home_1" as ID?
-    # Or keep it simple: "asset_id" (int) and "is_home" (bool).
-    
-    # We'll support both for flexibility.
-    raw_id = data.get('asset_id')
-    fault_type = data.get('fault_type')
-    duration = int(data.get('duration', 10))
-    is_home = data.get('is_home', False)
-
-    key = f"home_{raw_id}" if is_home else f"grid_{raw_id}"
-
-    # Set fault state
-    FAULT_STATE[key] = {
-        "type": fault_type,
-        "end_time": time.time() + duration
-    }
-
-    print(f"FAULT INJECTED: {key}, Type {fault_type}, Duration {duration}s")
-    return jsonify({"status": "Fault Injected", "target": key, "message": "Command Sent."})
+        return _json_response({"error": "No data provided"}, 400)
+
+    # Batch drill: a JSON list of fault commands applied in one round trip
+    if isinstance(data, list):
+        if not all(isinstance(entry, dict) for entry in data):
+            return _json_response({"error": "Batch entries must be objects"}, 400)
+        entries = data
+    elif isinstance(data, dict):
+        entries = [data]
+    else:
+        return _json_response({"error": "Fault command must be an object"}, 400)
+
+    # Validate every command before touching FAULT_STATE
+    try:
+        commands = [parse_fault_command(entry) for entry in entries]
+    except KeyError as e:
+        return _json_response({"error": f"Missing field: {e.args[0]}"}, 400)
+    except (TypeError, ValueError) as e:
+        return _json_response({"error": f"Bad fault command: {e}"}, 400)
+
+    results = [inject_fault(*command) for command in commands]
+    return _json_response(results if isinstance(data, list) else results[0])
 
 if __name__ == '__main__':
     init_db()
     sim_thread = threading.Thread(target=simulation_worker_refactored, daemon=True)
     sim_thread.start()
     print("System Online. IoT Layer Active.")
-    app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False) 
+
+    # Production WSGI server: serves dashboard polls and admin commands concurrently
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=5000, threads=8) 